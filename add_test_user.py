@@ -1,33 +1,50 @@
 import sqlite3
-import bcrypt
-
-# Connect to SQLite database
-conn = sqlite3.connect("users.db")
-c = conn.cursor()
-
-# Ensure the users table exists
-c.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL
-    )
-""")
+import sys
+
+from utils.hashing import hashing_service
+
+
+def main(count=1):
+    # Connect to SQLite database
+    conn = sqlite3.connect("users.db")
+    c = conn.cursor()
+
+    # Ensure the users table exists
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    """)
 
-# Define the test user credentials
-username = "test_user"
-plain_password = "test_password"
+    # Define the test user credentials; `python add_test_user.py 500` seeds
+    # test_user_1..test_user_500 with matching test_password_N passwords
+    if count == 1:
+        users = [("test_user", "test_password")]
+    else:
+        users = [(f"test_user_{i}", f"test_password_{i}") for i in range(1, count + 1)]
 
-# Hash the password before storing it
-hashed_password = bcrypt.hashpw(plain_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    # Hash the passwords in the hashing process pool before storing them
+    hashed_passwords = hashing_service.hash_many([password for _, password in users])
+    hashing_service.shutdown()
 
-# Insert the test user into the database
-try:
-    c.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, hashed_password))
+    # Insert the test users into the database, skipping existing usernames
+    c.executemany(
+        "INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)",
+        [(username, hashed) for (username, _), hashed in zip(users, hashed_passwords)],
+    )
+    added = c.rowcount
     conn.commit()
-    print("✅ Test user added successfully.")
-except sqlite3.IntegrityError:
-    print("⚠️ Username already exists.")
 
-# Close database connection
-conn.close()
\ No newline at end of file
+    if added:
+        print(f"✅ {added} test user(s) added successfully.")
+    if added < len(users):
+        print(f"⚠️ {len(users) - added} username(s) already exist.")
+
+    # Close database connection
+    conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
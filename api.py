@@ -0,0 +1,45 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from routes import auth, consult
+from utils.auth import token_cache
+from utils.db import init_db, dispose_engines, get_pool_metrics
+from utils.hashing import hashing_service, HashingBusyError
+from utils.metrics import stage_metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    yield
+    await dispose_engines()
+    hashing_service.shutdown()
+
+# === App setup ===
+app = FastAPI(title="Self Consultation API", lifespan=lifespan)
+app.include_router(auth.router)
+app.include_router(consult.router, prefix="/consult")
+
+@app.exception_handler(HashingBusyError)
+async def hashing_busy_handler(request: Request, exc: HashingBusyError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+# === Connection pool metrics ===
+@app.get("/metrics/db")
+def db_metrics():
+    return get_pool_metrics()
+
+# === Token cache metrics ===
+@app.get("/metrics/auth")
+def auth_metrics():
+    return token_cache.stats()
+
+# === Per-stage timing metrics ===
+@app.get("/metrics")
+def metrics():
+    return {
+        "stages": stage_metrics.snapshot(),
+        "db": get_pool_metrics(),
+        "auth": token_cache.stats(),
+    }
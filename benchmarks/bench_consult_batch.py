@@ -0,0 +1,47 @@
+"""
+Compare N single-record POSTs to /api/consult against one /api/consult/batch call.
+
+    $ python -m benchmarks.bench_consult_batch --records 5000
+"""
+import argparse
+import json
+import time
+
+from benchmarks.synthetic import make_records
+from main import app
+
+
+def bench_single(client, records):
+    start = time.perf_counter()
+    for record in records:
+        client.post("/api/consult", json=record)
+    return time.perf_counter() - start
+
+
+def bench_batch(client, records):
+    body = "\n".join(json.dumps(r) for r in records)
+    start = time.perf_counter()
+    response = client.post("/api/consult/batch", data=body, content_type="application/x-ndjson")
+    lines = len(response.get_data(as_text=True).splitlines())
+    elapsed = time.perf_counter() - start
+    assert lines == len(records)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=2000)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    client = app.test_client()
+
+    single = bench_single(client, records)
+    batch = bench_batch(client, records)
+    print(f"single: {single:.3f}s ({len(records) / single:,.0f} records/s)")
+    print(f"batch:  {batch:.3f}s ({len(records) / batch:,.0f} records/s)")
+    print(f"speedup: {single / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Latency/throughput benchmarks for the consult and auth paths.
+
+    $ python -m benchmarks.run --scale 2000
+    $ python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    $ python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.25
+
+Everything runs in-process: the Flask app through its test client, the
+FastAPI app through TestClient, and both against throwaway SQLite databases
+in a temp directory. Exits with status 1 when a scenario regresses past the
+tolerance against the baseline.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_consultations, make_patients, make_records, make_symptom_sets
+
+
+# === Scenarios ===
+# Each takes the shared context and returns (per-operation durations, records processed)
+def bench_diagnose(ctx):
+    from main import generate_diagnosis
+
+    durations = []
+    for symptoms in ctx["symptom_sets"]:
+        start = time.perf_counter()
+        generate_diagnosis(symptoms)
+        durations.append(time.perf_counter() - start)
+    return durations, len(durations)
+
+
+def bench_diagnose_batch(ctx):
+    from main import generate_diagnosis_batch
+
+    sets = ctx["symptom_sets"]
+    durations = []
+    for i in range(0, len(sets), 1000):
+        start = time.perf_counter()
+        generate_diagnosis_batch(sets[i:i + 1000])
+        durations.append(time.perf_counter() - start)
+    return durations, len(sets)
+
+
+def bench_flask_consult(ctx):
+    client = ctx["flask"]
+    durations = []
+    for record in ctx["records"]:
+        start = time.perf_counter()
+        response = client.post("/api/consult", json=record)
+        durations.append(time.perf_counter() - start)
+        assert response.status_code == 201, response.status_code
+    return durations, len(durations)
+
+
+def bench_flask_consult_batch(ctx):
+    body = "\n".join(json.dumps(r) for r in ctx["records"])
+    start = time.perf_counter()
+    response = ctx["flask"].post("/api/consult/batch", data=body, content_type="application/x-ndjson")
+    lines = response.get_data(as_text=True).splitlines()
+    durations = [time.perf_counter() - start]
+    assert len(lines) == len(ctx["records"]), len(lines)
+    return durations, len(lines)
+
+
+def bench_fastapi_register(ctx):
+    client = ctx["api"]
+    durations = []
+    for email, password in ctx["patients"]:
+        start = time.perf_counter()
+        response = client.post("/register", json={"email": email, "password": password})
+        durations.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return durations, len(durations)
+
+
+def bench_fastapi_login(ctx):
+    client = ctx["api"]
+    durations = []
+    ctx["tokens"] = []
+    for email, password in ctx["patients"]:
+        start = time.perf_counter()
+        response = client.post("/login", data={"username": email, "password": password})
+        durations.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+        ctx["tokens"].append(response.json()["access_token"])
+    return durations, len(durations)
+
+
+def seed_history(ctx, n, seed):
+    """Store n synthetic consultations for the benchmark patients (not timed)."""
+    from utils.consult_store import ConsultationStore
+
+    store = ConsultationStore()
+    store.add_many(make_consultations(ctx["patients"], n, seed), source="bench")
+    ctx["patient_ids"] = [store.patient_id(email.split("@")[0], email) for email, _ in ctx["patients"]]
+    store.close()
+
+
+def bench_fastapi_history(ctx):
+    # Each token is used several times so the verified-claims cache is exercised
+    client = ctx["api"]
+    durations = []
+    for _ in range(5):
+        for token, patient_id in zip(ctx.get("tokens", []), ctx["patient_ids"]):
+            start = time.perf_counter()
+            response = client.get(f"/consult/history/{patient_id}", headers={"Authorization": f"Bearer {token}"})
+            durations.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+            assert response.json()["history"], "history scenario hit an empty store"
+    return durations, len(durations)
+
+
+SCENARIOS = {
+    "diagnose": bench_diagnose,
+    "diagnose_batch": bench_diagnose_batch,
+    "flask_consult": bench_flask_consult,
+    "flask_consult_batch": bench_flask_consult_batch,
+    "fastapi_register": bench_fastapi_register,
+    "fastapi_login": bench_fastapi_login,
+    "fastapi_history": bench_fastapi_history,
+}
+
+# Scenarios that need another one to have run first (users to log in, tokens to use)
+REQUIRES = {
+    "fastapi_login": "fastapi_register",
+    "fastapi_history": "fastapi_login",
+}
+
+
+# === Reporting ===
+def run_scenario(name, ctx):
+    from utils.metrics import summarize
+
+    start = time.perf_counter()
+    durations, processed = SCENARIOS[name](ctx)
+    wall = time.perf_counter() - start
+    result = summarize(durations)
+    result["records"] = processed
+    result["throughput_per_s"] = processed / wall if wall else 0.0
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table; return the names of regressed scenarios."""
+    regressions = []
+    print(f"\n{'scenario':<22}{'p95 ms':>10}{'base':>10}{'ratio':>8}{'ops/s':>12}{'base':>12}{'ratio':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<22}{result['p95_ms']:>10.3f}{'-':>10}{'':>8}{result['throughput_per_s']:>12.1f}{'-':>12}")
+            continue
+        p95_ratio = result["p95_ms"] / base["p95_ms"] if base["p95_ms"] else 1.0
+        tput_ratio = result["throughput_per_s"] / base["throughput_per_s"] if base["throughput_per_s"] else 1.0
+        regressed = p95_ratio > 1 + tolerance or tput_ratio < 1 - tolerance
+        flag = "  REGRESSED" if regressed else ""
+        print(f"{name:<22}{result['p95_ms']:>10.3f}{base['p95_ms']:>10.3f}{p95_ratio:>8.2f}"
+              f"{result['throughput_per_s']:>12.1f}{base['throughput_per_s']:>12.1f}{tput_ratio:>8.2f}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def print_results(results):
+    print(f"{'scenario':<22}{'n':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}")
+    for name, r in results.items():
+        print(f"{name:<22}{r['count']:>8}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['throughput_per_s']:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=2000,
+                        help="symptom sets / consult records / stored consultations")
+    parser.add_argument("--patients", type=int, default=100, help="users registered and logged in")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4,
+                        help="bcrypt cost for the run (production default is 12)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--save-baseline", help="write results JSON here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the apps (and their engines/pools) are imported
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        os.environ["CONSULT_DB_PATH"] = os.path.join(tmp, "consultations.db")
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+        from fastapi.testclient import TestClient
+        from api import app as api_app
+        from main import app as flask_app
+        from utils.metrics import stage_metrics
+
+        ctx = {
+            "symptom_sets": make_symptom_sets(args.scale, args.seed),
+            "records": make_records(args.scale, args.seed),
+            "patients": make_patients(args.patients, args.seed),
+            "flask": flask_app.test_client(),
+        }
+        names = args.only or list(SCENARIOS)
+        needed = set(names)
+        for name in names:
+            while name in REQUIRES:
+                name = REQUIRES[name]
+                needed.add(name)
+        if "fastapi_history" in needed:
+            seed_history(ctx, args.scale, args.seed)
+
+        results = {}
+        with TestClient(api_app) as api_client:
+            ctx["api"] = api_client
+            for name in SCENARIOS:
+                if name not in needed:
+                    continue
+                result = run_scenario(name, ctx)
+                if name in names:
+                    results[name] = result
+
+    print_results(results)
+    print("\nPer-stage timings (ms):")
+    for stage, s in sorted(stage_metrics.snapshot().items()):
+        print(f"  {stage:<16} n={s['count']:<8} p50={s['p50_ms']:.3f} p95={s['p95_ms']:.3f} p99={s['p99_ms']:.3f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nSaved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\nRegressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
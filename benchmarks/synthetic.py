@@ -0,0 +1,54 @@
+"""Deterministic synthetic patients and symptom sets for the benchmarks."""
+import random
+
+SYMPTOMS = [
+    "fever", "cough", "sore throat", "toothache", "gum pain", "swelling",
+    "diarrhea", "vomiting", "abdominal pain", "headache", "migraine", "nausea",
+    "fatigue", "rash",
+]
+
+
+def make_symptom_sets(n, seed=0):
+    rng = random.Random(seed)
+    return [rng.sample(SYMPTOMS, rng.randint(1, 4)) for _ in range(n)]
+
+
+def make_records(n, seed=0):
+    """Report payloads in the /api/consult request shape."""
+    rng = random.Random(seed)
+    return [
+        {
+            "symptoms": symptoms,
+            "duration": rng.choice(["less than 3 days", "more than 1 week"]),
+            "severity": rng.choice(["low", "moderate", "high"]),
+        }
+        for symptoms in make_symptom_sets(n, seed)
+    ]
+
+
+def make_patients(n, seed=0):
+    """(email, password) pairs for the /register and /login benchmarks."""
+    rng = random.Random(seed)
+    return [(f"patient{i}@example.com", f"pw-{rng.getrandbits(32):08x}") for i in range(n)]
+
+
+def make_consultations(patients, n, seed=0):
+    """
+    n stored-consultation records spread round-robin over the benchmark
+    patients; each patient is owned by its own account (username = email).
+    """
+    rng = random.Random(seed)
+    symptom_sets = make_symptom_sets(n, seed)
+    for i, symptoms in enumerate(symptom_sets):
+        email, _ = patients[i % len(patients)]
+        yield {
+            "source_id": str(i),
+            "name": email.split("@")[0],
+            "username": email,
+            "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                    f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+            "age": rng.randint(1, 90),
+            "gender": rng.choice(["Male", "Female"]),
+            "symptoms": symptoms,
+            "diagnosis": rng.choice(["Dental infection", "Gastroenteritis", "Tension headache or migraine"]),
+        }
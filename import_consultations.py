@@ -0,0 +1,99 @@
+import csv
+import os
+import sqlite3
+import sys
+
+from utils.consult_store import ConsultationStore, CONSULT_DB_PATH
+
+FETCH_SIZE = 1000
+
+
+def iter_csv(path):
+    # consultations.csv: timestamp,username,patient_name,age,gender,complaint,summary
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            yield {
+                "source_id": str(line_number),
+                "date": row["timestamp"],
+                "username": row["username"],
+                "name": row["patient_name"],
+                "age": int(row["age"]) if row["age"] else None,
+                "gender": row["gender"],
+                "symptoms": row["complaint"],
+                "summary": row["summary"],
+            }
+
+
+def iter_rows(path, query):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(query)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Skipping {path}: {e}")
+    finally:
+        conn.close()
+
+
+def iter_patient_data_db(path):
+    # patient_data.db: flat consultations(name, age, gender, symptoms, diagnosis, treatment, created_at)
+    for row in iter_rows(path, "SELECT * FROM consultations ORDER BY id"):
+        yield {
+            "source_id": str(row["id"]),
+            "date": row["created_at"],
+            "name": row["name"],
+            "age": row["age"],
+            "gender": row["gender"],
+            "symptoms": row["symptoms"],
+            "diagnosis": row["diagnosis"],
+            "treatment": row["treatment"],
+        }
+
+
+def iter_users_db(path):
+    # users.db: consultations joined to patients(username, name, age, gender)
+    query = """
+        SELECT c.id, c.date, c.symptoms, c.diagnosis, c.treatment,
+               p.username, p.name, p.age, p.gender
+        FROM consultations c JOIN patients p ON p.id = c.patient_id
+        ORDER BY c.id
+    """
+    for row in iter_rows(path, query):
+        yield {
+            "source_id": str(row["id"]),
+            "date": row["date"],
+            "username": row["username"],
+            "name": row["name"],
+            "age": row["age"],
+            "gender": row["gender"],
+            "symptoms": row["symptoms"],
+            "diagnosis": row["diagnosis"],
+            "treatment": row["treatment"],
+        }
+
+
+SOURCES = [
+    ("csv", "consultations.csv", iter_csv),
+    ("patient_data", "patient_data.db", iter_patient_data_db),
+    ("users", "users.db", iter_users_db),
+]
+
+
+def main(db_path=CONSULT_DB_PATH):
+    store = ConsultationStore(db_path)
+    for source, path, reader in SOURCES:
+        if not os.path.exists(path):
+            print(f"⚠️ {path} not found, skipping.")
+            continue
+        inserted = store.add_many(reader(path), source=source)
+        print(f"✅ {path}: {inserted} consultation(s) imported.")
+    store.close()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
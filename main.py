@@ -1,77 +1,270 @@
-from flask import Flask, send_from_directory, request, jsonify
+from flask import Flask, Response, abort, g, send_file, send_from_directory, request, jsonify, stream_with_context
 from flask_cors import CORS
+import json
 import os
+import re
+from functools import wraps
+
+from jose import JWTError
+
+from utils.auth import verify_access_token
+from utils.consult_store import get_store
+from utils.diagnosis import RuleEngine, DEFAULT_RULES_PATH
+from utils.metrics import stage_metrics
+from utils.report_renderer import report_renderer, report_from_consultation
+from utils.static_assets import StaticAssets
 
 # === App setup ===
 app = Flask(__name__, static_folder='static')
 CORS(app)
 
+# Compressed variants, ETags and hashed names for static/ are built once here
+static_assets = StaticAssets(app.static_folder)
+
+# === Authentication ===
+# Same bearer JWTs as the FastAPI app (see utils/auth.py); the token subject
+# is the account that owns the patients and reports it touches.
+def require_user(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        try:
+            claims = verify_access_token(token) if scheme.lower() == 'bearer' and token else None
+        except JWTError:
+            claims = None
+        if not claims or not claims.get('sub'):
+            return jsonify({"error": "Invalid or expired token"}), 401, {"WWW-Authenticate": "Bearer"}
+        g.user = claims
+        return view(*args, **kwargs)
+    return wrapper
+
 # === Serve the main index.html ===
 @app.route('/')
 def serve_index():
-    return send_from_directory(app.static_folder, 'index.html')
+    for name in ('index.html', 'index.htm'):
+        response = static_assets.response(request, name)
+        if response is not None:
+            return response
+    abort(404)
 
 # === Serve static files (CSS, JS, images) ===
 @app.route('/<path:path>')
 def serve_static(path):
+    response = static_assets.response(request, path)
+    if response is not None:
+        return response
     return send_from_directory(app.static_folder, path)
 
 # === Consultation API endpoint ===
 @app.route('/api/consult', methods=['POST'])
 def consult():
-    data = request.get_json()
-    symptoms = data.get('symptoms', [])
-    duration = data.get('duration')
-    severity = data.get('severity')
-    notes = data.get('notes', '')
+    with stage_metrics.stage('parse'):
+        data = request.get_json()
+        symptoms = data.get('symptoms', [])
 
     # Diagnosis logic
-    diagnosis, treatment, lab_exams = generate_diagnosis(symptoms)
+    with stage_metrics.stage('diagnose'):
+        ranked = rule_engine.diagnose(symptoms)
 
-    report = {
-        "symptoms": symptoms,
-        "duration": duration,
-        "severity": severity,
-        "notes": notes,
+    with stage_metrics.stage('serialize'):
+        report = build_report(data, ranked)
+        response = jsonify(report)
+
+    return response, 201
+
+def build_report(data, ranked):
+    diagnosis, treatment, lab_exams = primary_diagnosis(ranked)
+
+    return {
+        "symptoms": data.get('symptoms', []),
+        "duration": data.get('duration'),
+        "severity": data.get('severity'),
+        "notes": data.get('notes', ''),
         "diagnosis": diagnosis,
         "treatment": treatment,
-        "labExams": lab_exams
+        "labExams": lab_exams,
+        "differentialDiagnoses": differential_diagnoses(ranked)
     }
 
-    return jsonify(report), 201
+# === Batch consultation API endpoint ===
+# Accepts a JSON array (Content-Type: application/json) or NDJSON (one report
+# per line) and streams one NDJSON line per record back as it is processed:
+#   {"index": 0, "report": {...}}   or   {"index": 1, "error": "..."}
+BATCH_CHUNK_SIZE = int(os.environ.get('CONSULT_BATCH_CHUNK_SIZE', 256))
+
+@app.route('/api/consult/batch', methods=['POST'])
+def consult_batch():
+    if request.mimetype == 'application/json':
+        try:
+            records = json.load(request.stream)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid JSON: {e}"}), 400
+        if not isinstance(records, list):
+            return jsonify({"error": "Expected a JSON array of reports"}), 400
+        records = iter(records)
+    else:
+        records = iter_ndjson(request.stream)
+
+    def generate():
+        offset = 0
+        for chunk in iter_chunks(records, BATCH_CHUNK_SIZE):
+            yield ''.join(process_batch_chunk(chunk, offset))
+            offset += len(chunk)
+
+    return Response(stream_with_context(generate()), status=200, mimetype='application/x-ndjson')
+
+class BatchRecordError(ValueError):
+    pass
+
+def iter_ndjson(stream):
+    for raw in stream:
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield BatchRecordError(f"Invalid JSON: {e}")
+
+def iter_chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def validate_record(record):
+    if isinstance(record, BatchRecordError):
+        raise record
+    if not isinstance(record, dict):
+        raise BatchRecordError("Report must be a JSON object")
+    symptoms = record.get('symptoms', [])
+    if not isinstance(symptoms, list):
+        raise BatchRecordError("'symptoms' must be a list")
+    return symptoms
+
+def process_batch_chunk(chunk, offset):
+    valid, symptom_sets, errors = [], [], {}
+    for i, record in enumerate(chunk):
+        try:
+            symptom_sets.append(validate_record(record))
+            valid.append(i)
+        except BatchRecordError as e:
+            errors[i] = str(e)
+
+    # Timed per chunk, so kept apart from the per-request stages
+    with stage_metrics.stage('batch_diagnose'):
+        ranked = dict(zip(valid, rule_engine.diagnose_batch(symptom_sets)))
+
+    with stage_metrics.stage('batch_serialize'):
+        lines = []
+        for i, record in enumerate(chunk):
+            if i in errors:
+                line = {"index": offset + i, "error": errors[i]}
+            else:
+                line = {"index": offset + i, "report": build_report(record, ranked[i])}
+            lines.append(json.dumps(line) + "\n")
+    return lines
+
+# === PDF report rendering ===
+# Rendering runs in a background process pool; poll the job, then download.
+# Jobs belong to the account that submitted them and are only visible to it.
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+@app.route('/api/reports', methods=['POST'])
+@require_user
+def create_report():
+    report = request.get_json()
+    if not isinstance(report, dict):
+        return jsonify({"error": "Expected a report object"}), 400
+    job_id = report_renderer.submit(report, owner=g.user['sub'])
+    return jsonify(report_renderer.status(job_id, owner=g.user['sub'])), 202
+
+# Renders the caller's own stored consultations in a date range
+@app.route('/api/reports/bulk', methods=['POST'])
+@require_user
+def create_reports_bulk():
+    data = request.get_json() or {}
+    start, end = data.get('start'), data.get('end')
+    if not start or not end:
+        return jsonify({"error": "'start' and 'end' dates are required"}), 400
+    rows = get_store().between(start, end, username=g.user['sub'])
+    job_ids = report_renderer.submit_many((report_from_consultation(row) for row in rows), owner=g.user['sub'])
+    return jsonify({"jobs": job_ids, "count": len(job_ids)}), 202
+
+@app.route('/api/reports/<job_id>')
+@require_user
+def report_status(job_id):
+    if not JOB_ID_PATTERN.fullmatch(job_id):
+        return jsonify({"error": "Invalid job id"}), 404
+    status = report_renderer.status(job_id, owner=g.user['sub'])
+    return jsonify(status), 404 if status['status'] == 'unknown' else 200
+
+@app.route('/api/reports/<job_id>/pdf')
+@require_user
+def report_download(job_id):
+    if not JOB_ID_PATTERN.fullmatch(job_id):
+        return jsonify({"error": "Invalid job id"}), 404
+    status = report_renderer.status(job_id, owner=g.user['sub'])
+    if status['status'] != 'done':
+        return jsonify(status), 404 if status['status'] == 'unknown' else 409
+    return send_file(os.path.abspath(report_renderer.path(job_id, g.user['sub'])), mimetype='application/pdf',
+                     download_name=f"consultation_{job_id[:12]}.pdf")
+
+# === Consultation analytics ===
+# e.g. /api/analytics?period=week&dimension=diagnosis&start=2025-06-01
+@app.route('/api/analytics')
+@require_user
+def analytics():
+    from utils.analytics import ConsultationAnalytics, PERIODS, refresh_if_stale
+
+    period = request.args.get('period', 'day')
+    if period not in PERIODS:
+        return jsonify({"error": f"period must be one of {', '.join(PERIODS)}"}), 400
+    conn = get_store().conn
+    # Rate-limited: at most one incremental refresh per interval, the rest only read
+    refresh_if_stale(conn)
+    frame = ConsultationAnalytics(conn).rollups(
+        period,
+        dimension=request.args.get('dimension'),
+        start=request.args.get('start'),
+        end=request.args.get('end'),
+    )
+    # Per-account volumes are only shown for the caller's own account
+    frame = frame[(frame['dimension'] != 'username') | (frame['value'] == g.user['sub'])]
+    return jsonify({"period": period, "rows": frame.to_dict(orient='records')})
+
+# === Per-stage timing metrics ===
+@app.route('/api/metrics')
+def metrics():
+    return jsonify({"stages": stage_metrics.snapshot()})
 
 # === Rule-based diagnosis logic ===
-def generate_diagnosis(symptoms):
-    s = [sym.lower() for sym in symptoms]
-
-    rules = [
-        (lambda s: 'fever' in s and 'cough' in s,
-         'Likely upper respiratory tract infection (URTI)',
-         'Paracetamol, rest, fluids',
-         'CBC, COVID-19 test'),
-
-        (lambda s: 'toothache' in s,
-         'Dental infection',
-         'Amoxicillin, Diclofenac, dental referral',
-         'Panoramic X-ray'),
-
-        (lambda s: 'diarrhea' in s,
-         'Gastroenteritis',
-         'Oral rehydration salts, zinc, Metronidazole',
-         'Stool analysis, culture'),
-
-        (lambda s: 'headache' in s,
-         'Tension headache or migraine',
-         'Paracetamol or Ibuprofen, hydration, rest',
-         'Blood pressure check, optional CT if persistent')
-    ]
+# The rule table is compiled once at startup into an indexed engine
+rule_engine = RuleEngine.from_file(os.environ.get('DIAGNOSIS_RULES', DEFAULT_RULES_PATH))
 
-    for condition, diag, treat, labs in rules:
-        if condition(s):
-            return diag, treat, labs
+def primary_diagnosis(ranked):
+    if ranked:
+        best = ranked[0]
+        return best['condition'], best['treatment'], best['labExams']
 
     return 'Unspecified condition', 'Supportive care', 'CBC, Urinalysis'
 
+def differential_diagnoses(ranked):
+    return [
+        {"condition": c['condition'], "score": c['score'], "matched": c['matched']}
+        for c in ranked[1:4]
+    ]
+
+def generate_diagnosis(symptoms):
+    return primary_diagnosis(rule_engine.diagnose(symptoms))
+
+def generate_diagnosis_batch(symptom_sets):
+    return [primary_diagnosis(ranked) for ranked in rule_engine.diagnose_batch(symptom_sets)]
+
 # === App entry point ===
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -1,19 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from models.user import User
-from utils.auth import hash_password, verify_password, create_access_token
+from utils.auth import (
+    hash_password_async, verify_and_update_password, create_access_token,
+    oauth2_scheme, get_current_user, revoke_access_token,
+)
+from utils.db import get_async_db, checkout
+from utils.metrics import stage_metrics
 from datetime import timedelta
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 router = APIRouter()
 
-DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
 class UserCreate(BaseModel):
     email: str
     password: str
@@ -22,24 +23,59 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+async def get_user_by_email(db: AsyncSession, email: str):
+    with stage_metrics.stage("db"):
+        await checkout(db)
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+
+async def release(db: AsyncSession):
+    # Ends the read transaction so the pooled connection isn't held while bcrypt runs
+    await db.rollback()
+
 @router.post("/register", response_model=Token)
-def register_user(user: UserCreate):
-    db = SessionLocal()
-    existing = db.query(User).filter(User.email == user.email).first()
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await get_user_by_email(db, user.email)
+    await release(db)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
-    new_user = User(email=user.email, hashed_password=hash_password(user.password))
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    access_token = create_access_token(data={"sub": new_user.email}, expires_delta=timedelta(minutes=30))
+    with stage_metrics.stage("hash"):
+        hashed = await hash_password_async(user.password)
+    new_user = User(email=user.email, hashed_password=hashed)
+    try:
+        with stage_metrics.stage("db"):
+            db.add(new_user)
+            await db.commit()
+    except IntegrityError:
+        # Registered by a concurrent request while we were hashing
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    with stage_metrics.stage("jwt"):
+        access_token = create_access_token(data={"sub": user.email}, expires_delta=timedelta(minutes=30))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
-    db = SessionLocal()
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await get_user_by_email(db, form_data.username)
+    if not user:
+        await release(db)
         raise HTTPException(status_code=400, detail="Invalid credentials")
-    access_token = create_access_token(data={"sub": user.email}, expires_delta=timedelta(minutes=30))
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    # Read what we need before release(): rolling back expires loaded objects
+    user_id, email, stored_hash = user.id, user.email, user.hashed_password
+    await release(db)
+    with stage_metrics.stage("hash"):
+        valid, new_hash = await verify_and_update_password(form_data.password, stored_hash)
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid credentials")
+    if new_hash:
+        # Stored hash uses outdated settings (e.g. lower BCRYPT_ROUNDS); upgrade it
+        with stage_metrics.stage("db"):
+            await db.execute(update(User).where(User.id == user_id).values(hashed_password=new_hash))
+            await db.commit()
+    with stage_metrics.stage("jwt"):
+        access_token = create_access_token(data={"sub": email}, expires_delta=timedelta(minutes=30))
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/logout", status_code=204)
+def logout_user(token: str = Depends(oauth2_scheme), current_user: dict = Depends(get_current_user)):
+    revoke_access_token(token)
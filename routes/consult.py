@@ -1,11 +1,32 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from utils.auth import get_current_user
+from utils.consult_store import ConsultationStore, get_store
+from utils.metrics import stage_metrics
 
 router = APIRouter()
 
 @router.post("/")
-def consult():
+def consult(current_user: dict = Depends(get_current_user)):
     return {"report": "This is a consultation report"}
 
 @router.get("/history/{user_id}")
-def history(user_id: int):
-    return {"history": f"Consultation history for user {user_id}"}
\ No newline at end of file
+def history(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    store: ConsultationStore = Depends(get_store),
+):
+    with stage_metrics.stage("db"):
+        patient = store.patient(user_id)
+    # Patients are owned by the account (token subject) that recorded them;
+    # unknown IDs get the same 403 so IDs can't be probed
+    if patient is None or patient["username"] != current_user["sub"]:
+        raise HTTPException(status_code=403, detail="Not allowed to view this patient's history")
+    try:
+        with stage_metrics.stage("db"):
+            page = store.history(user_id, limit=limit, before=before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"history": page["items"], "next": page["next"]}
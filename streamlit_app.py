@@ -2,16 +2,65 @@ import streamlit as st
 
 st.set_page_config(page_title="Smart Medical Assistant", layout="wide")
 
-st.title("🤖 Medical Self-Consultation Tool")
-st.write("Welcome! Please answer the following to receive suggestions.")
-
-# Add fields
-name = st.text_input("Patient Name")
-age = st.number_input("Age", min_value=0)
-symptoms = st.text_area("Describe symptoms")
-
-if st.button("Get Diagnosis"):
-    if symptoms:
-        st.success(f"Possible diagnosis for {name}: [Example Output]")
-    else:
-        st.warning("Please describe your symptoms first.")
+page = st.sidebar.radio("Page", ["Consultation", "Analytics"])
+
+
+def consultation_page():
+    st.title("🤖 Medical Self-Consultation Tool")
+    st.write("Welcome! Please answer the following to receive suggestions.")
+
+    # Add fields
+    name = st.text_input("Patient Name")
+    age = st.number_input("Age", min_value=0)
+    symptoms = st.text_area("Describe symptoms")
+
+    if st.button("Get Diagnosis"):
+        if symptoms:
+            st.success(f"Possible diagnosis for {name}: [Example Output]")
+        else:
+            st.warning("Please describe your symptoms first.")
+
+
+# Rollups are refreshed incrementally, so re-running this every minute is cheap
+@st.cache_data(ttl=60)
+def load_rollups(period, dimension):
+    from utils.analytics import ConsultationAnalytics
+    from utils.consult_store import ConsultationStore
+
+    store = ConsultationStore()
+    try:
+        analytics = ConsultationAnalytics(store.conn)
+        analytics.refresh()
+        return analytics.rollups(period, dimension=dimension)
+    finally:
+        store.close()
+
+
+def analytics_page():
+    from utils.analytics import DIMENSIONS
+
+    st.title("📊 Consultation Analytics")
+
+    period = st.radio("Period", ["day", "week"], horizontal=True)
+    totals = load_rollups(period, "total")
+    if totals.empty:
+        st.info("No consultations yet. Run `python import_consultations.py` to load history.")
+        return
+
+    st.subheader("Consultations")
+    st.bar_chart(totals.set_index("bucket")["count"])
+
+    dimension = st.selectbox("Break down by", DIMENSIONS)
+    breakdown = load_rollups(period, dimension)
+    if breakdown.empty:
+        st.write("No data for this breakdown.")
+        return
+    table = breakdown.pivot_table(index="bucket", columns="value", values="count", fill_value=0)
+    st.bar_chart(table)
+    st.dataframe(table)
+
+
+if page == "Analytics":
+    analytics_page()
+else:
+    consultation_page()
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 50000
+# Minimum seconds between rollup refreshes triggered from the read path
+REFRESH_INTERVAL = float(os.environ.get("ANALYTICS_REFRESH_INTERVAL", 60))
+PERIODS = ("day", "week")
+DIMENSIONS = ("complaint", "diagnosis", "gender", "age_group", "username")
+AGE_BINS = [-np.inf, 17, 34, 49, 64, np.inf]
+AGE_LABELS = ["0-17", "18-34", "35-49", "50-64", "65+"]
+
+# Columns every history chunk is normalized to
+COLUMNS = ["id", "date", "username", "age", "gender", "diagnosis", "symptoms"]
+
+STORE_QUERY = """
+    SELECT c.id, c.date, p.username, c.age, c.gender, c.diagnosis, c.symptoms
+    FROM consultations c JOIN patients p ON p.id = c.patient_id
+    WHERE c.id > ?
+    ORDER BY c.id
+    LIMIT ?
+"""
+
+
+# === Loading history in columnar chunks ===
+def load_store_chunk(conn, after_id=0, chunksize=CHUNK_SIZE):
+    """Up to `chunksize` consultations with id > after_id, fully fetched (no cursor left open)."""
+    chunk = pd.read_sql_query(STORE_QUERY, conn, params=(after_id, chunksize))
+    chunk["symptoms"] = chunk["symptoms"].map(json.loads)
+    return chunk[COLUMNS]
+
+
+# === Vectorized aggregation ===
+def _long_format(chunk):
+    """Reshape a chunk into (day, week, dimension, value) rows, one per counted fact."""
+    dates = pd.to_datetime(chunk["date"], errors="coerce", format="mixed")
+    chunk = chunk.assign(
+        day=dates.dt.strftime("%Y-%m-%d"),
+        # Weeks are labelled by their Monday
+        week=(dates - pd.to_timedelta(dates.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d"),
+        age_group=pd.cut(pd.to_numeric(chunk["age"], errors="coerce"), AGE_BINS, labels=AGE_LABELS).astype("string"),
+        gender=chunk["gender"].astype("string").str.strip().str.title(),
+        diagnosis=chunk["diagnosis"].astype("string").str.strip(),
+        username=chunk["username"].astype("string").str.strip(),
+    ).dropna(subset=["day"])
+
+    # A consultation counts once per complaint it lists
+    complaints = chunk[["day", "week", "symptoms"]].explode("symptoms")
+    complaints = complaints.assign(
+        dimension="complaint",
+        value=complaints["symptoms"].astype("string").str.strip().str.lower(),
+    )[["day", "week", "dimension", "value"]]
+
+    scalar = chunk.melt(
+        id_vars=["day", "week"],
+        value_vars=["diagnosis", "gender", "age_group", "username"],
+        var_name="dimension",
+        value_name="value",
+    )
+    totals = chunk[["day", "week"]].assign(dimension="total", value="all")
+
+    facts = pd.concat([complaints, scalar, totals], ignore_index=True)
+    facts = facts[facts["value"].notna() & (facts["value"] != "")]
+    return facts
+
+
+def aggregate(chunk):
+    """
+    Count a history chunk per (period, bucket, dimension, value).
+
+    Returns a DataFrame with columns period, bucket, dimension, value, count;
+    the "total" dimension holds the number of consultations per bucket.
+    """
+    facts = _long_format(chunk)
+    frames = []
+    for period in PERIODS:
+        counts = facts.groupby([period, "dimension", "value"], observed=True).size()
+        counts = counts.rename("count").reset_index().rename(columns={period: "bucket"})
+        frames.append(counts.assign(period=period))
+    return pd.concat(frames, ignore_index=True)[["period", "bucket", "dimension", "value", "count"]]
+
+
+# === Incremental materialized rollups ===
+class ConsultationAnalytics:
+    """
+    Rollup counts stored next to the consultations (see migration 3 in
+    utils/consult_store.py). refresh() only reads consultations added since
+    the last run and adds their counts onto the stored totals.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def watermark(self):
+        row = self.conn.execute("SELECT value FROM analytics_state WHERE key = 'last_consultation_id'").fetchone()
+        return int(row[0]) if row else 0
+
+    def refresh(self, chunksize=CHUNK_SIZE):
+        """
+        Fold new consultations into the rollups; returns how many were added.
+
+        Safe to call concurrently from several connections: each chunk is
+        read with no cursor left open, then written under BEGIN IMMEDIATE
+        only if the watermark it was read from is still current.
+        """
+        added = 0
+        while True:
+            start_id = self.watermark()
+            chunk = load_store_chunk(self.conn, start_id, chunksize)
+            if chunk.empty:
+                return added
+            counts = aggregate(chunk)
+            last_id = int(chunk["id"].max())
+
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.watermark() != start_id:
+                    # Another refresh folded rows in meanwhile; re-read from its watermark
+                    self.conn.rollback()
+                    continue
+                self.conn.executemany(
+                    """
+                    INSERT INTO analytics_rollups (period, bucket, dimension, value, count)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (period, bucket, dimension, value)
+                    DO UPDATE SET count = count + excluded.count
+                    """,
+                    [(p, b, d, v, int(c)) for p, b, d, v, c in counts.itertuples(index=False, name=None)],
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO analytics_state (key, value) VALUES ('last_consultation_id', ?)",
+                    (last_id,),
+                )
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+            added += len(chunk)
+
+    def rollups(self, period="day", dimension=None, start=None, end=None):
+        """Stored counts as a DataFrame, filtered by dimension and start <= bucket < end."""
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {PERIODS}")
+        where, params = ["period = ?"], [period]
+        if dimension:
+            where.append("dimension = ?")
+            params.append(dimension)
+        if start:
+            where.append("bucket >= ?")
+            params.append(start)
+        if end:
+            where.append("bucket < ?")
+            params.append(end)
+        return pd.read_sql_query(
+            f"SELECT bucket, dimension, value, count FROM analytics_rollups "
+            f"WHERE {' AND '.join(where)} ORDER BY bucket, dimension, count DESC",
+            self.conn,
+            params=params,
+        )
+
+
+_last_refresh = None
+_refresh_lock = threading.Lock()
+
+def refresh_if_stale(conn, interval=REFRESH_INTERVAL):
+    """
+    Refresh the rollups unless this process already did so in the last
+    `interval` seconds. Requests arriving while a refresh runs don't wait
+    for it; they read the rollups as they are.
+    """
+    global _last_refresh
+    if not _refresh_lock.acquire(blocking=False):
+        return 0
+    try:
+        if _last_refresh is not None and time.monotonic() - _last_refresh < interval:
+            return 0
+        added = ConsultationAnalytics(conn).refresh()
+        _last_refresh = time.monotonic()
+        return added
+    finally:
+        _refresh_lock.release()
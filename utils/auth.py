@@ -1,12 +1,17 @@
-from passlib.context import CryptContext
+import os
 from datetime import datetime, timedelta
+from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from utils.hashing import make_crypt_context, hashing_service
+from utils.metrics import stage_metrics
+from utils.token_cache import TokenCache, token_digest
 
-SECRET_KEY = "your-secret-key"
+SECRET_KEY = os.environ.get("JWT_SECRET", "your-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = make_crypt_context()
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -14,9 +19,57 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# Async variants run bcrypt in the hashing process pool (see utils/hashing.py)
+async def hash_password_async(password: str) -> str:
+    return await hashing_service.hash(password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    return await hashing_service.verify_and_update(plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+def decode_access_token(token: str) -> dict:
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+# === Token verification ===
+# Verified claims are cached per token digest so repeat calls skip the
+# signature check; see utils/token_cache.py
+token_cache = TokenCache()
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+
+def verify_access_token(token: str) -> dict:
+    digest = token_digest(token)
+    if token_cache.is_revoked(digest):
+        raise JWTError("Token has been revoked")
+    claims = token_cache.get(digest)
+    if claims is None:
+        with stage_metrics.stage("jwt"):
+            claims = decode_access_token(token)
+        token_cache.put(digest, claims)
+    return claims
+
+def revoke_access_token(token: str):
+    try:
+        exp = decode_access_token(token).get("exp")
+    except JWTError:
+        # Invalid or already expired tokens are rejected anyway
+        return
+    token_cache.revoke(token_digest(token), exp)
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    try:
+        claims = verify_access_token(token)
+    except JWTError:
+        claims = None
+    if not claims or not claims.get("sub"):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return claims
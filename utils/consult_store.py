@@ -0,0 +1,230 @@
+import json
+import os
+import sqlite3
+import threading
+
+CONSULT_DB_PATH = os.environ.get("CONSULT_DB_PATH", "consultations.db")
+INSERT_CHUNK_SIZE = 1000
+
+# === Schema migrations ===
+# Applied in order; PRAGMA user_version records how many have run.
+MIGRATIONS = [
+    """
+    CREATE TABLE patients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL DEFAULT '',
+        name TEXT NOT NULL,
+        UNIQUE (username, name)
+    );
+    CREATE TABLE consultations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        patient_id INTEGER NOT NULL REFERENCES patients(id),
+        date TEXT NOT NULL,
+        age INTEGER,
+        gender TEXT,
+        symptoms TEXT NOT NULL,
+        diagnosis TEXT,
+        treatment TEXT,
+        lab_exams TEXT,
+        summary TEXT,
+        source TEXT NOT NULL,
+        source_id TEXT,
+        UNIQUE (source, source_id)
+    );
+    CREATE INDEX idx_consultations_patient_date ON consultations (patient_id, date, id);
+    CREATE INDEX idx_consultations_diagnosis ON consultations (diagnosis, date, id);
+    """,
+    """
+    CREATE INDEX idx_consultations_date ON consultations (date, id);
+    """,
+    """
+    CREATE TABLE analytics_rollups (
+        period TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (period, bucket, dimension, value)
+    );
+    CREATE TABLE analytics_state (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """,
+]
+
+CONSULTATION_COLUMNS = (
+    "patient_id", "date", "age", "gender", "symptoms", "diagnosis",
+    "treatment", "lab_exams", "summary", "source", "source_id",
+)
+
+
+def encode_cursor(row):
+    return f"{row['date']}|{row['id']}"
+
+
+def decode_cursor(cursor):
+    """Parse a 'date|id' cursor; raises ValueError for anything else."""
+    date, sep, row_id = cursor.rpartition("|")
+    if not sep or not date or not row_id.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return date, int(row_id)
+
+
+class ConsultationStore:
+    """
+    Single SQLite store for consultations from the API and the legacy sources
+    (consultations.csv, patient_data.db, users.db).
+
+    History queries use keyset pagination on (date, id): pass the returned
+    `next` cursor as `before` to get the following page.
+    """
+
+    def __init__(self, path=CONSULT_DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.migrate()
+        self._patient_ids = {}
+
+    def migrate(self):
+        # Several threads/workers may open an out-of-date DB at once: BEGIN
+        # IMMEDIATE takes the write lock before user_version is read, so each
+        # migration runs once and the others see it as already applied.
+        # (executescript would commit the open transaction, hence the split.)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS):
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in script.split(";"):
+                    if statement.strip():
+                        self.conn.execute(statement)
+                self.conn.execute(f"PRAGMA user_version = {number}")
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+    def close(self):
+        self.conn.close()
+
+    # === Writes ===
+    def patient_id(self, name, username=""):
+        key = (username or "", name)
+        patient_id = self._patient_ids.get(key)
+        if patient_id is None:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO patients (username, name) VALUES (?, ?)", key
+            )
+            patient_id = self.conn.execute(
+                "SELECT id FROM patients WHERE username = ? AND name = ?", key
+            ).fetchone()[0]
+            self._patient_ids[key] = patient_id
+        return patient_id
+
+    def _row(self, record, source):
+        symptoms = record.get("symptoms") or []
+        if isinstance(symptoms, str):
+            symptoms = [s.strip() for s in symptoms.split(",") if s.strip()]
+        return (
+            self.patient_id(record["name"], record.get("username", "")),
+            record["date"],
+            record.get("age"),
+            record.get("gender"),
+            json.dumps(symptoms),
+            record.get("diagnosis"),
+            record.get("treatment"),
+            record.get("labExams"),
+            record.get("summary"),
+            source,
+            record.get("source_id"),
+        )
+
+    def add_many(self, records, source="api"):
+        """
+        Insert consultation dicts in chunked executemany transactions.
+        Records with a (source, source_id) already stored are skipped, so
+        re-running an import is safe. Returns the number of rows inserted.
+        """
+        sql = (
+            f"INSERT OR IGNORE INTO consultations ({', '.join(CONSULTATION_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(CONSULTATION_COLUMNS))})"
+        )
+        inserted = 0
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= INSERT_CHUNK_SIZE:
+                inserted += self._insert_chunk(sql, chunk, source)
+                chunk = []
+        if chunk:
+            inserted += self._insert_chunk(sql, chunk, source)
+        return inserted
+
+    def _insert_chunk(self, sql, chunk, source):
+        try:
+            with self.conn:
+                cursor = self.conn.executemany(sql, [self._row(r, source) for r in chunk])
+        except sqlite3.Error:
+            # Patients created in the rolled-back transaction are gone too
+            self._patient_ids.clear()
+            raise
+        return cursor.rowcount
+
+    def add(self, record, source="api"):
+        return self.add_many([record], source)
+
+    # === Reads ===
+    def patient(self, patient_id):
+        return self.conn.execute("SELECT * FROM patients WHERE id = ?", (patient_id,)).fetchone()
+
+    def _page(self, where, params, limit, before):
+        if before:
+            where += " AND (date, id) < (?, ?)"
+            params += decode_cursor(before)
+        rows = self.conn.execute(
+            f"SELECT * FROM consultations WHERE {where} ORDER BY date DESC, id DESC LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        items = [dict(row, symptoms=json.loads(row["symptoms"])) for row in rows]
+        next_cursor = encode_cursor(rows[-1]) if len(rows) == limit else None
+        return {"items": items, "next": next_cursor}
+
+    def history(self, patient_id, limit=50, before=None):
+        """Newest-first consultations for a patient (served by the (patient_id, date) index)."""
+        return self._page("patient_id = ?", (patient_id,), limit, before)
+
+    def by_diagnosis(self, diagnosis, limit=50, before=None):
+        return self._page("diagnosis = ?", (diagnosis,), limit, before)
+
+    def between(self, start, end, username=None):
+        """
+        Iterate consultations with start <= date < end, oldest first, without
+        loading them all; `username` limits them to patients of that account.
+        """
+        if username is None:
+            return self.conn.execute(
+                "SELECT * FROM consultations WHERE date >= ? AND date < ? ORDER BY date, id",
+                (start, end),
+            )
+        return self.conn.execute(
+            "SELECT c.* FROM consultations c JOIN patients p ON p.id = c.patient_id "
+            "WHERE p.username = ? AND c.date >= ? AND c.date < ? ORDER BY c.date, c.id",
+            (username, start, end),
+        )
+
+
+# sqlite3 connections shouldn't be shared between threads; FastAPI runs sync
+# routes in a threadpool, so each worker thread gets its own store.
+_local = threading.local()
+
+def get_store():
+    store = getattr(_local, "store", None)
+    if store is None:
+        store = _local.store = ConsultationStore()
+    return store
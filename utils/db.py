@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+# === Configuration ===
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./test.db")
+# Async driver URL; derived from DATABASE_URL for SQLite when not set
+ASYNC_DATABASE_URL = os.environ.get(
+    "ASYNC_DATABASE_URL", DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+
+# === Pool metrics ===
+class PoolMetrics:
+    """Counters fed by SQLAlchemy pool events plus session checkout wait times."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def watch(self, pool):
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.in_use -= 1
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "wait_avg_ms": (self.wait_total / self.waits * 1000) if self.waits else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+            }
+
+
+# === Engine setup ===
+def _engine_kwargs(url):
+    url = make_url(url)
+    kwargs = {}
+    if url.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # In-memory SQLite lives and dies with a single connection
+            return kwargs
+    kwargs.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+    return kwargs
+
+
+def _install_sqlite_pragmas(engine):
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers proceed while a login/register write is in flight
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL))
+_install_sqlite_pragmas(engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+pool_metrics = PoolMetrics()
+pool_metrics.watch(engine.pool)
+
+# The async engine is only built the first time an async session is requested,
+# so sync-only tools don't need the async driver (aiosqlite) installed.
+_async_engine = None
+_AsyncSessionLocal = None
+async_pool_metrics = PoolMetrics()
+_async_lock = threading.Lock()
+
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    with _async_lock:
+        if _async_engine is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            _async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_kwargs(ASYNC_DATABASE_URL))
+            _install_sqlite_pragmas(_async_engine.sync_engine)
+            async_pool_metrics.watch(_async_engine.sync_engine.pool)
+            _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+# === Session dependencies ===
+async def get_async_db():
+    """
+    FastAPI dependency: one async session per request, always closed.
+
+    No connection is checked out up front: the session takes one on its first
+    query (see checkout) and hands it back to the pool on commit/rollback, so
+    handlers can release it before slow non-DB work such as bcrypt.
+    """
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+async def checkout(db):
+    """Check out the session's connection now, recording how long the pool made us wait."""
+    start = time.perf_counter()
+    await db.connection()
+    async_pool_metrics.record_wait(time.perf_counter() - start)
+
+
+def init_db():
+    from models.user import Base
+
+    Base.metadata.create_all(bind=engine)
+
+
+async def dispose_engines():
+    engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+
+def get_pool_metrics():
+    metrics = {"sync": pool_metrics.snapshot()}
+    if hasattr(engine.pool, "checkedout"):
+        metrics["sync"]["pool_checked_out"] = engine.pool.checkedout()
+    if _async_engine is not None:
+        metrics["async"] = async_pool_metrics.snapshot()
+    return metrics
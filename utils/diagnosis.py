@@ -0,0 +1,112 @@
+import json
+import os
+from collections import defaultdict
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "diagnosis_rules.json")
+
+
+def normalize_symptom(symptom) -> str:
+    # "  Sore   Throat " -> "sore throat"
+    return " ".join(str(symptom).split()).lower()
+
+
+class RuleEngine:
+    """
+    Rule-based diagnosis compiled from a declarative rule table.
+
+    Each rule lists the symptoms it scores on, the symptoms that must all be
+    present for it to fire ("required") and the minimum number of symptom
+    matches ("min_match", default 1). Symptoms are interned to integer IDs and
+    an inverted index maps each symptom ID to the rules that mention it, so a
+    lookup only touches the rules sharing at least one symptom with the input.
+    """
+
+    def __init__(self, rules):
+        self._symptom_ids = {}
+        self._index = defaultdict(list)
+        self._rules = []
+
+        for position, rule in enumerate(rules):
+            symptom_ids = {self._intern(s) for s in rule["symptoms"]}
+            required_ids = frozenset(self._intern(s) for s in rule.get("required", []))
+            symptom_ids |= required_ids
+            for symptom_id in symptom_ids:
+                self._index[symptom_id].append(position)
+            self._rules.append({
+                "condition": rule["condition"],
+                "treatment": rule["treatment"],
+                "labExams": rule["labExams"],
+                "symptoms": frozenset(symptom_ids),
+                "required": required_ids,
+                "min_match": rule.get("min_match", 1),
+            })
+
+        self._index = dict(self._index)
+        self._symptom_names = {i: name for name, i in self._symptom_ids.items()}
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_RULES_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self._rules)
+
+    def _intern(self, symptom) -> int:
+        name = normalize_symptom(symptom)
+        symptom_id = self._symptom_ids.get(name)
+        if symptom_id is None:
+            symptom_id = self._symptom_ids[name] = len(self._symptom_ids)
+        return symptom_id
+
+    def encode(self, symptoms) -> frozenset:
+        """Map raw symptom strings to known symptom IDs; unknown symptoms are dropped."""
+        ids = self._symptom_ids
+        return frozenset(
+            ids[name] for name in map(normalize_symptom, symptoms) if name in ids
+        )
+
+    def _score(self, symptom_ids, limit):
+        counts = defaultdict(int)
+        for symptom_id in symptom_ids:
+            for position in self._index[symptom_id]:
+                counts[position] += 1
+
+        matches = []
+        for position, score in counts.items():
+            rule = self._rules[position]
+            if score >= rule["min_match"] and rule["required"] <= symptom_ids:
+                matches.append((position, score))
+
+        # Highest score first; ties keep rule table order
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        if limit is not None:
+            matches = matches[:limit]
+
+        results = []
+        for position, score in matches:
+            rule = self._rules[position]
+            matched = sorted(self._symptom_names[i] for i in symptom_ids & rule["symptoms"])
+            results.append({
+                "condition": rule["condition"],
+                "treatment": rule["treatment"],
+                "labExams": rule["labExams"],
+                "score": score,
+                "matched": matched,
+            })
+        return results
+
+    def diagnose(self, symptoms, limit=None):
+        """Return matching conditions sorted by score (number of matched symptoms), best first."""
+        return self._score(self.encode(symptoms), limit)
+
+    def diagnose_batch(self, symptom_sets, limit=None):
+        """Score many symptom lists in one call; identical sets are scored only once."""
+        seen = {}
+        results = []
+        for symptoms in symptom_sets:
+            symptom_ids = self.encode(symptoms)
+            if symptom_ids not in seen:
+                seen[symptom_ids] = self._score(symptom_ids, limit)
+            results.append(seen[symptom_ids])
+        return results
@@ -0,0 +1,153 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.context import CryptContext
+
+# === Configuration ===
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", os.cpu_count() or 1))
+# Max hashes queued or running at once; callers beyond this wait, then get rejected
+HASH_QUEUE_SIZE = int(os.environ.get("HASH_QUEUE_SIZE", HASH_WORKERS * 4))
+HASH_QUEUE_TIMEOUT = float(os.environ.get("HASH_QUEUE_TIMEOUT", 0.5))
+
+
+def make_crypt_context(rounds=BCRYPT_ROUNDS):
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when the hashing queue stays full for longer than the queue timeout."""
+
+
+# === Worker process side ===
+_worker_context = None
+
+def _init_worker(rounds):
+    global _worker_context
+    _worker_context = make_crypt_context(rounds)
+
+def _hash(password):
+    return _worker_context.hash(password)
+
+def _verify_and_update(password, hashed):
+    # Returns (matches, new_hash); new_hash is set when the stored hash is deprecated
+    return _worker_context.verify_and_update(password, hashed)
+
+
+# === Service ===
+class HashingService:
+    """
+    Runs bcrypt in a process pool so hashing doesn't hold the GIL of the
+    request process. At most `queue_size` jobs are in flight; a caller that
+    can't get a slot within `queue_timeout` seconds gets HashingBusyError.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, queue_size=HASH_QUEUE_SIZE,
+                 queue_timeout=HASH_QUEUE_TIMEOUT, rounds=BCRYPT_ROUNDS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.rounds = rounds
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a threaded server process is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.rounds,),
+                )
+            return self._executor
+
+    def _discard_executor(self, executor):
+        # A worker died (OOM kill, segfault) and the pool refuses all further
+        # work; drop it so the next submit builds a fresh one
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _submit(self, fn, *args):
+        # Caller must already hold a slot
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                executor = self._get_executor()
+                future = executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        future.add_done_callback(lambda f: self._check_broken(executor, f))
+        return future
+
+    def _check_broken(self, executor, future):
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard_executor(executor)
+
+    def _acquire(self, timeout):
+        if not self._slots.acquire(timeout=timeout):
+            raise HashingBusyError("Password hashing queue is full, try again shortly")
+
+    async def _acquire_async(self):
+        if self._slots.acquire(blocking=False):
+            return
+        waiter = asyncio.ensure_future(asyncio.to_thread(self._slots.acquire, timeout=self.queue_timeout))
+        try:
+            # Shielded so the thread's result is still observed if the request is cancelled
+            acquired = await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            waiter.add_done_callback(self._release_abandoned)
+            raise
+        if not acquired:
+            raise HashingBusyError("Password hashing queue is full, try again shortly")
+
+    def _release_abandoned(self, waiter):
+        # The caller stopped waiting, but the thread may still have won a slot; hand it back
+        if not waiter.cancelled() and waiter.exception() is None and waiter.result():
+            self._slots.release()
+
+    async def _run(self, fn, *args):
+        # Jobs lost to a crashed pool are retried once on the rebuilt pool
+        for _ in range(2):
+            await self._acquire_async()
+            try:
+                return await asyncio.wrap_future(self._submit(fn, *args))
+            except BrokenProcessPool as e:
+                error = e
+        raise HashingBusyError("Password hashing workers crashed, try again shortly") from error
+
+    async def hash(self, password):
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, password, hashed):
+        return await self._run(_verify_and_update, password, hashed)
+
+    def hash_many(self, passwords):
+        """Blocking bulk hash for scripts; waits for free slots instead of rejecting."""
+        futures = []
+        for password in passwords:
+            self._acquire(timeout=None)
+            futures.append(self._submit(_hash, password))
+        return [f.result() for f in futures]
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+hashing_service = HashingService()
@@ -0,0 +1,81 @@
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Recent samples kept per stage for percentiles
+STAGE_SAMPLES = int(os.environ.get("METRICS_STAGE_SAMPLES", 2048))
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile (q in 0-100) of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(q / 100 * len(sorted_values)))) - 1
+    return sorted_values[rank]
+
+
+def summarize(seconds):
+    """count/mean/p50/p95/p99/max in milliseconds for a list of durations in seconds."""
+    values = sorted(seconds)
+    n = len(values)
+    return {
+        "count": n,
+        "mean_ms": (sum(values) / n * 1000) if n else 0.0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": (values[-1] * 1000) if n else 0.0,
+    }
+
+
+class StageMetrics:
+    """
+    Lightweight per-stage timings (parse, diagnose, db, hash, jwt, serialize).
+    Totals are exact; percentiles come from the most recent samples.
+    """
+
+    def __init__(self, samples=STAGE_SAMPLES):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=samples))
+        self._counts = defaultdict(int)
+        self._totals = defaultdict(float)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._samples[stage].append(seconds)
+            self._counts[stage] += 1
+            self._totals[stage] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            samples = {stage: list(values) for stage, values in self._samples.items()}
+            counts = dict(self._counts)
+            totals = dict(self._totals)
+        result = {}
+        for stage, values in samples.items():
+            summary = summarize(values)
+            summary["count"] = counts[stage]
+            summary["mean_ms"] = totals[stage] / counts[stage] * 1000
+            summary["total_ms"] = totals[stage] * 1000
+            result[stage] = summary
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._totals.clear()
+
+
+stage_metrics = StageMetrics()
@@ -0,0 +1,169 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# === Configuration ===
+REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR", os.path.join("reports", "cache"))
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", 2))
+# Bump when the PDF layout changes so old cached files aren't served
+RENDERER_VERSION = "1"
+
+
+def report_key(report: dict) -> str:
+    """Content hash of a report; identical reports map to the same PDF."""
+    payload = json.dumps(report, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{RENDERER_VERSION}:{payload}".encode("utf-8")).hexdigest()
+
+
+def report_from_consultation(row) -> dict:
+    """Turn a ConsultationStore row into the /api/consult report shape."""
+    return {
+        "patient": row["patient_id"],
+        "date": row["date"],
+        "symptoms": json.loads(row["symptoms"]) if isinstance(row["symptoms"], str) else row["symptoms"],
+        "diagnosis": row["diagnosis"],
+        "treatment": row["treatment"],
+        "labExams": row["lab_exams"],
+        "notes": row["summary"] or "",
+    }
+
+
+# === Worker process side ===
+def _render_pdf(report, path):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfgen import canvas
+
+    width, height = A4
+    margin = 50
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.setTitle("Consultation Report")
+    y = height - margin
+
+    def line(text, font="Helvetica", size=11, gap=16):
+        nonlocal y
+        for chunk in simpleSplit(str(text), font, size, width - 2 * margin) or [""]:
+            if y < margin:
+                pdf.showPage()
+                y = height - margin
+            pdf.setFont(font, size)
+            pdf.drawString(margin, y, chunk)
+            y -= gap
+
+    line("Consultation Report", "Helvetica-Bold", 16, 28)
+    for label, key in [("Date", "date"), ("Patient", "patient"), ("Duration", "duration"), ("Severity", "severity")]:
+        if report.get(key) is not None:
+            line(f"{label}: {report[key]}")
+    line(f"Symptoms: {', '.join(map(str, report.get('symptoms') or [])) or '-'}")
+    y -= 8
+    line(f"Diagnosis: {report.get('diagnosis') or '-'}", "Helvetica-Bold")
+    line(f"Treatment: {report.get('treatment') or '-'}")
+    line(f"Lab exams: {report.get('labExams') or '-'}")
+    differentials = report.get("differentialDiagnoses") or []
+    if differentials:
+        y -= 8
+        line("Differential diagnoses:", "Helvetica-Bold")
+        for d in differentials:
+            line(f"  - {d.get('condition')} (score {d.get('score')})")
+    if report.get("notes"):
+        y -= 8
+        line("Notes:", "Helvetica-Bold")
+        line(report["notes"])
+
+    pdf.save()
+
+    # Unique per render: another process may be rendering the same report
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".pdf.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(buffer.getvalue())
+        # Publish atomically so readers never see a half-written PDF
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+# === Render service ===
+class ReportRenderer:
+    """
+    Renders report PDFs in a background process pool.
+
+    The job ID is the report's content hash, which is also the cache file
+    name: submitting a report that was already rendered (by this or any
+    other server process) returns immediately, and identical reports that
+    are in flight share one render.
+
+    Files are kept in one directory per owner (the account that submitted
+    them), so a job ID is only found again by the same owner.
+    """
+
+    def __init__(self, cache_dir=REPORT_CACHE_DIR, workers=REPORT_WORKERS):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self._executor = None
+        self._pending = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def path(self, job_id, owner=""):
+        owner_dir = hashlib.sha256(owner.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, owner_dir, f"{job_id}.pdf")
+
+    def submit(self, report: dict, owner="") -> str:
+        job_id = report_key(report)
+        # Pending jobs and errors are keyed by path, i.e. per owner
+        path = self.path(job_id, owner)
+        with self._lock:
+            if path in self._pending or os.path.exists(path):
+                return job_id
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._errors.pop(path, None)
+            future = self._get_executor().submit(_render_pdf, report, path)
+            self._pending[path] = future
+        future.add_done_callback(lambda f: self._finish(path, f))
+        return job_id
+
+    def submit_many(self, reports, owner="") -> list:
+        return [self.submit(report, owner) for report in reports]
+
+    def _finish(self, path, future):
+        with self._lock:
+            self._pending.pop(path, None)
+            if future.exception() is not None:
+                self._errors[path] = str(future.exception())
+
+    def status(self, job_id, owner="") -> dict:
+        path = self.path(job_id, owner)
+        with self._lock:
+            if path in self._pending:
+                return {"job_id": job_id, "status": "pending"}
+            error = self._errors.get(path)
+        # A PDF on disk wins over a local failure: another process may have rendered it
+        if os.path.exists(path):
+            return {"job_id": job_id, "status": "done"}
+        if error is not None:
+            return {"job_id": job_id, "status": "failed", "error": error}
+        return {"job_id": job_id, "status": "unknown"}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+report_renderer = ReportRenderer()
@@ -0,0 +1,145 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import Response, send_file
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Files up to this size are kept in memory together with their compressed variants
+INLINE_MAX_BYTES = int(os.environ.get("STATIC_INLINE_MAX_BYTES", 512 * 1024))
+COMPRESS_MIN_BYTES = 256
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# src="..." / href="..." pointing at a local file, for cache-busting rewrites in HTML
+ASSET_REF_PATTERN = re.compile(r'(?P<attr>(?:src|href)=["\'])(?P<path>[^"\':?#]+)(?P<end>["\'])')
+
+
+class Asset:
+    def __init__(self, name, path, data, mimetype):
+        self.name = name
+        self.path = path
+        self.mimetype = mimetype
+        self.size = len(data)
+        digest = hashlib.sha256(data).hexdigest()
+        self.etag = digest[:32]
+        root, ext = os.path.splitext(name)
+        self.hashed_name = f"{root}.{digest[:10]}{ext}"
+        self.data = data if self.size <= INLINE_MAX_BYTES else None
+        self.variants = {}
+        if self.data is not None:
+            self._compress()
+
+    def _compress(self):
+        if self.size < COMPRESS_MIN_BYTES or not self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            return
+        variants = {"gzip": gzip.compress(self.data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(self.data, quality=11)
+        # Only keep variants that actually save bytes
+        self.variants = {enc: body for enc, body in variants.items() if len(body) < self.size}
+
+
+class StaticAssets:
+    """
+    Precomputed static files: strong ETags, gzip/brotli variants and
+    content-hashed file names (logo.<hash>.png), all built once at startup.
+
+    Hashed names are served with an immutable one-year Cache-Control; the
+    plain names are served with no-cache so clients revalidate cheaply via
+    If-None-Match and get a 304.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._assets = {}
+        self._by_hashed_name = {}
+        self.load()
+
+    def load(self):
+        assets = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    data = f.read()
+                mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                assets[name] = Asset(name, path, data, mimetype)
+
+        # HTML pages point at the hashed names so browsers can cache assets forever
+        for asset in assets.values():
+            if asset.mimetype == "text/html" and asset.data is not None:
+                html = asset.data.decode("utf-8")
+                rewritten = ASSET_REF_PATTERN.sub(lambda m: self._rewrite_ref(m, assets), html)
+                if rewritten != html:
+                    assets[asset.name] = Asset(asset.name, asset.path, rewritten.encode("utf-8"), asset.mimetype)
+
+        self._assets = assets
+        self._by_hashed_name = {a.hashed_name: a for a in assets.values()}
+
+    @staticmethod
+    def _rewrite_ref(match, assets):
+        asset = assets.get(match["path"].lstrip("/"))
+        if asset is None or asset.mimetype == "text/html":
+            return match.group(0)
+        prefix = "/" if match["path"].startswith("/") else ""
+        return f"{match['attr']}{prefix}{asset.hashed_name}{match['end']}"
+
+    def get(self, name):
+        """Return (asset, immutable) for a plain or hashed name, or (None, False)."""
+        asset = self._by_hashed_name.get(name)
+        if asset is not None:
+            return asset, True
+        return self._assets.get(name), False
+
+    def url_for(self, name):
+        asset = self._assets.get(name)
+        return asset.hashed_name if asset else name
+
+    def response(self, request, name):
+        asset, immutable = self.get(name)
+        if asset is None:
+            return None
+
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+            "Vary": "Accept-Encoding",
+        }
+
+        encoding = None
+        if asset.variants:
+            for candidate in ("br", "gzip"):
+                if candidate in asset.variants and request.accept_encodings[candidate]:
+                    encoding = candidate
+                    break
+
+        # Each encoding is a different byte stream, so it gets its own strong ETag
+        etag = f"{asset.etag}-{encoding}" if encoding else asset.etag
+        if request.if_none_match.contains(etag):
+            response = Response(status=304, headers=headers)
+            response.set_etag(etag)
+            return response
+
+        if asset.data is None:
+            response = send_file(os.path.abspath(asset.path), mimetype=asset.mimetype, etag=etag,
+                                 conditional=True)
+            response.headers.update(headers)
+            return response
+
+        body = asset.variants[encoding] if encoding else asset.data
+        response = Response(body, mimetype=asset.mimetype, headers=headers)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.set_etag(etag)
+        return response
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = float(os.environ.get("TOKEN_CACHE_TTL", 300))
+
+
+def token_digest(token: str) -> str:
+    # Never keep raw bearer tokens around as cache keys
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """
+    LRU + TTL cache of verified JWT claims keyed by token digest.
+
+    An entry lives for at most `ttl` seconds and never past the token's own
+    `exp` claim. Revoked digests are remembered until their token would have
+    expired anyway.
+    """
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revoked_hits = 0
+
+    def get(self, digest):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if expires_at <= now:
+                del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def put(self, digest, claims):
+        now = time.time()
+        expires_at = now + self.ttl
+        if "exp" in claims:
+            expires_at = min(expires_at, float(claims["exp"]))
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._entries[digest] = (claims, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revoke(self, digest, exp=None):
+        now = time.time()
+        with self._lock:
+            self._entries.pop(digest, None)
+            # Tokens without an exp claim stay revoked for the life of the process
+            self._revoked[digest] = float(exp) if exp is not None else float("inf")
+            # Drop revocations for tokens that have expired on their own
+            expired = [d for d, e in self._revoked.items() if e <= now]
+            for d in expired:
+                del self._revoked[d]
+
+    def is_revoked(self, digest):
+        with self._lock:
+            if digest in self._revoked:
+                self.revoked_hits += 1
+                return True
+            return False
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "revoked": len(self._revoked),
+                "revoked_hits": self.revoked_hits,
+            }